@@ -4,7 +4,13 @@ import argparse
 import sys
 from pathlib import Path
 
-from .pipeline import blend
+
+def _song_arg(value: str) -> Path:
+    """argparse type: resolve the song path and require an existing file."""
+    path = Path(value).expanduser().resolve()
+    if not path.is_file():
+        raise argparse.ArgumentTypeError(f"File not found: {path}")
+    return path
 
 
 def main():
@@ -12,18 +18,16 @@ def main():
         prog="blender",
         description="The Blender — turn any song into a performable remix.",
     )
-    parser.add_argument("song", type=Path, help="Path to song file (mp3, wav, flac, etc.)")
+    parser.add_argument("song", type=_song_arg, help="Path to song file (mp3, wav, flac, etc.)")
     parser.add_argument("--bpm", type=float, default=None, help="Override auto-detected BPM")
     parser.add_argument("--output-dir", type=Path, default=None, help="Output directory (default: current dir)")
     parser.add_argument("--stems", type=str, default=None, help="Comma-separated stems to keep (e.g., drums,bass,vocals)")
     parser.add_argument("--verbose", action="store_true", help="Show detailed analysis output")
+    parser.add_argument("--pretty", action="store_true", help="Indent the generated .perf.json for reading")
 
     args = parser.parse_args()
 
-    song = args.song.expanduser().resolve()
-    if not song.exists():
-        print(f"Error: File not found: {song}")
-        sys.exit(1)
+    song = args.song
 
     stems_filter = None
     if args.stems:
@@ -31,6 +35,9 @@ def main():
 
     print(f'Blending "{song.name}"')
 
+    # Deferred so --help and argument errors don't pay for numpy/numba/librosa
+    from .pipeline import blend
+
     try:
         blend(
             song_path=song,
@@ -38,6 +45,7 @@ def main():
             bpm_override=args.bpm,
             stems_filter=stems_filter,
             verbose=args.verbose,
+            pretty=args.pretty,
         )
     except RuntimeError as e:
         print(f"\nError: {e}")
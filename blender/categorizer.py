@@ -10,11 +10,17 @@
   accent      — short punchy moments (ad-libs, fills)    3-5 oneshots
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from .slicer import Slice
+import numpy as np
+
+from .slicer import Slice, SliceTable
 from .defaults import CATEGORY_LIMITS
 
+_FS_WORKERS = 8  # threads for the final rename/unlink pass
+
 
 def select_primitives(
     stem_slices: dict[str, list[Slice]],
@@ -26,82 +32,123 @@ def select_primitives(
                      Each slice has pre-computed energy and spectral_centroid.
 
     Returns:
-        {category: [Slice, ...]} with each slice's .category field set.
+        {category: [Slice, ...]} with each slice's .category and .index fields set.
     """
     drums = stem_slices.get("drums", [])
     bass = stem_slices.get("bass", [])
     vocals = stem_slices.get("vocals", [])
     other = stem_slices.get("other", [])
 
+    # Feature columns over every slice, built once; stems are index ranges
+    table = SliceTable.from_slices(drums + bass + vocals + other)
+    energy, centroid, duration_ms = table.energies, table.centroids, table.durations_ms
+    drums_idx, bass_idx, vocals_idx, other_idx = np.split(
+        np.arange(len(table)), np.cumsum([len(drums), len(bass), len(vocals)]),
+    )
+
     primitives: dict[str, list[Slice]] = {cat: [] for cat in CATEGORY_LIMITS}
+    used_paths: set[Path] = set()  # paths already claimed by a category
 
     # --- Foundation: highest transient density bars from drums ---
     if drums:
-        by_energy = sorted(drums, key=lambda s: s.energy, reverse=True)
+        by_energy = _rank(table, drums_idx, -energy)
         primitives["foundation"] = _take(by_energy, CATEGORY_LIMITS["foundation"], "foundation")
+        used_paths.update(s.path for s in primitives["foundation"])
 
     # --- Groove: next-best drum bars (different from foundation) ---
     if drums:
-        used = {s.start_time for s in primitives["foundation"]}
-        remaining = [s for s in drums if s.start_time not in used]
+        remaining = _unclaimed(table, drums_idx, used_paths)
         # Prefer high centroid (hats/shakers tend to be brighter)
-        by_centroid = sorted(remaining, key=lambda s: s.spectral_centroid, reverse=True)
+        by_centroid = _rank(table, remaining, -centroid)
         primitives["groove"] = _take(by_centroid, CATEGORY_LIMITS["groove"], "groove")
+        used_paths.update(s.path for s in primitives["groove"])
 
     # --- Bass: most distinct bass phrases (by spectral contrast) ---
     if bass:
         # Pick most energetic, then most spectrally different
-        by_energy = sorted(bass, key=lambda s: s.energy, reverse=True)
+        by_energy = _rank(table, bass_idx, -energy)
         primitives["bass"] = _take_diverse(by_energy, CATEGORY_LIMITS["bass"], "bass")
+        used_paths.update(s.path for s in primitives["bass"])
 
     # --- Harmonic Bed: longest, most stable section from 'other' stem ---
     if other:
-        by_duration = sorted(other, key=lambda s: s.duration_ms, reverse=True)
+        by_duration = _rank(table, other_idx, -duration_ms)
         primitives["harmonic_bed"] = _take(by_duration, CATEGORY_LIMITS["harmonic_bed"], "harmonic_bed")
+        used_paths.update(s.path for s in primitives["harmonic_bed"])
 
     # --- Hook: highest energy + most distinct from vocals ---
     if vocals:
-        by_energy = sorted(vocals, key=lambda s: s.energy, reverse=True)
+        by_energy = _rank(table, vocals_idx, -energy)
         primitives["hook"] = _take(by_energy, CATEGORY_LIMITS["hook"], "hook")
+        used_paths.update(s.path for s in primitives["hook"])
 
     # --- Texture: lowest energy sections across all stems ---
-    all_slices = drums + bass + vocals + other
-    used_paths = {s.path for cat_slices in primitives.values() for s in cat_slices}
-    available = [s for s in all_slices if s.path not in used_paths]
-    by_low_energy = sorted(available, key=lambda s: s.energy)
+    available = _unclaimed(table, np.arange(len(table)), used_paths)
+    by_low_energy = _rank(table, available, energy)
     primitives["texture"] = _take(by_low_energy, CATEGORY_LIMITS["texture"], "texture")
+    used_paths.update(s.path for s in primitives["texture"])
 
     # --- Accent: sharpest transients, shortest duration, across all stems ---
-    used_paths = {s.path for cat_slices in primitives.values() for s in cat_slices}
-    available = [s for s in all_slices if s.path not in used_paths]
+    available = _unclaimed(table, available, used_paths)
     # Short + high energy = punchy accent
-    by_punch = sorted(available, key=lambda s: s.energy / max(s.duration_ms, 1), reverse=True)
+    punch = energy / np.maximum(duration_ms, 1)
+    by_punch = _rank(table, available, -punch)
     primitives["accent"] = _take(by_punch, CATEGORY_LIMITS["accent"], "accent")
 
     # Rename all selected files with category prefix
-    for category, slices in primitives.items():
-        for i, sl in enumerate(slices):
-            new_name = f"{category}-{i + 1:02d}.wav"
-            new_path = sl.path.parent / new_name
-            if sl.path.exists() and sl.path != new_path:
-                sl.path.rename(new_path)
-                sl.path = new_path
-
-    # Delete unused files
-    all_kept = {s.path for cat_slices in primitives.values() for s in cat_slices}
-    for stem_slices_list in stem_slices.values():
-        for sl in stem_slices_list:
-            if sl.path not in all_kept and sl.path.exists():
-                sl.path.unlink(missing_ok=True)
+    renames = []  # (slice, src, dst)
+    for slices in primitives.values():
+        for sl in slices:
+            src = os.fspath(sl.path)
+            dst = os.path.join(os.path.dirname(src), f"{sl.category}-{sl.index:02d}.wav")
+            if src != dst:
+                renames.append((sl, src, dst))
+
+    with ThreadPoolExecutor(max_workers=_FS_WORKERS) as pool:
+        renamed = pool.map(_rename, [src for _, src, _ in renames], [dst for _, _, dst in renames])
+        for (sl, _, dst), ok in zip(renames, renamed):
+            if ok:
+                sl.path = Path(dst)
+
+        # Delete unused files (after renames, so kept paths are final)
+        all_kept = frozenset(os.fspath(s.path) for cat_slices in primitives.values() for s in cat_slices)
+        unused = [
+            sl.path
+            for stem_slices_list in stem_slices.values()
+            for sl in stem_slices_list
+            if os.fspath(sl.path) not in all_kept
+        ]
+        list(pool.map(lambda path: path.unlink(missing_ok=True), unused))
 
     return primitives
 
 
+def _rename(src: str, dst: str) -> bool:
+    """os.rename that reports a missing source instead of raising."""
+    try:
+        os.rename(src, dst)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _rank(table: SliceTable, idx: np.ndarray, keys: np.ndarray) -> list[Slice]:
+    """Slices at idx ordered by ascending keys (stable, like sorted())."""
+    order = idx[np.argsort(keys[idx], kind="stable")]
+    return [table[i] for i in order]
+
+
+def _unclaimed(table: SliceTable, idx: np.ndarray, used_paths: set[Path]) -> np.ndarray:
+    """Indices from idx whose slice has not been claimed by a category yet."""
+    return np.array([i for i in idx if table[i].path not in used_paths], dtype=np.intp)
+
+
 def _take(slices: list[Slice], n: int, category: str) -> list[Slice]:
-    """Take up to n slices, setting their category."""
+    """Take up to n slices, setting their category and index."""
     result = slices[:n]
-    for s in result:
+    for i, s in enumerate(result, start=1):
         s.category = category
+        s.index = i
     return result
 
 
@@ -109,20 +156,21 @@ def _take_diverse(slices: list[Slice], n: int, category: str) -> list[Slice]:
     """Take up to n spectrally diverse slices (greedy selection)."""
     if not slices:
         return []
-    selected = [slices[0]]
-    slices[0].category = category
-    for s in slices[1:]:
-        if len(selected) >= n:
+    centroids = SliceTable.from_slices(slices).centroids
+    selected_idx = [0]
+    for i in range(1, len(slices)):
+        if len(selected_idx) >= n:
             break
         # Only add if spectrally different from all selected
-        min_dist = min(abs(s.spectral_centroid - sel.spectral_centroid) for sel in selected)
+        min_dist = np.abs(centroids[selected_idx] - centroids[i]).min()
         if min_dist > 200:  # Hz threshold for "different enough"
-            s.category = category
-            selected.append(s)
+            selected_idx.append(i)
     # If we didn't get enough diverse ones, fill with remaining
-    if len(selected) < n:
-        for s in slices:
-            if s not in selected and len(selected) < n:
-                s.category = category
-                selected.append(s)
+    if len(selected_idx) < n:
+        chosen = set(selected_idx)
+        selected_idx += [i for i in range(len(slices)) if i not in chosen][:n - len(selected_idx)]
+    selected = [slices[i] for i in selected_idx]
+    for i, s in enumerate(selected, start=1):
+        s.category = category
+        s.index = i
     return selected
@@ -3,6 +3,13 @@
 import json
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used as a fallback
+    orjson = None
+
 from .slicer import Slice
 from .defaults import (
     CATEGORY_MODES, CATEGORY_COLORS, CATEGORY_VOLUMES,
@@ -11,20 +18,152 @@ from .defaults import (
 )
 
 
-def _infer_interval(duration_ms: float, bpm: float, default: str) -> str:
-    """Snap slice duration to nearest musical interval."""
-    beat_ms = 60000 / bpm
-    bar_ms = beat_ms * 4
-    bars = duration_ms / bar_ms
-
-    if bars <= 1.5:
-        return "1m"
-    elif bars <= 3:
-        return "2m"
-    elif bars <= 6:
-        return "4m"
-    else:
-        return "8m"
+# Static performance wiring shared by every blended song. Reused across
+# generate_config() calls without copying, so treat these as read-only.
+_GESTURES = {
+    "/gesture/1": {
+        "name": "pull back",
+        "streams": {"energy_down": 1, "all_movement": 1},
+        "stacks": {"total_moves": 1, "pull_back_streak": 1},
+        "intents": ["strip_energy"],
+        "signals": ["stop"],
+    },
+    "/gesture/2": {
+        "name": "push energy",
+        "streams": {"energy_up": 1, "all_movement": 1},
+        "stacks": {"total_moves": 1, "push_streak": 1},
+        "intents": ["add_energy"],
+        "signals": ["start"],
+    },
+    "/gesture/3": {
+        "name": "structure shift",
+        "streams": {"structure_rate": 1, "all_movement": 1},
+        "stacks": {"total_moves": 1, "structure_count": 1},
+        "intents": ["shift_structure"],
+        "signals": [],
+    },
+}
+
+_STREAMS = {
+    "energy_down": {
+        "window_ms": 5000,
+        "thresholds": [{"above": 6, "action": {"intent": "frantic_strip"}}],
+    },
+    "energy_up": {
+        "window_ms": 5000,
+        "thresholds": [{"above": 6, "action": {"intent": "explosive_build"}}],
+    },
+    "structure_rate": {
+        "window_ms": 5000,
+        "thresholds": [{"above": 4, "action": {"intent": "total_reset"}}],
+    },
+    "all_movement": {
+        "window_ms": 5000,
+        "thresholds": [{"above": 10, "action": {"intent": "peak_frenzy"}}],
+    },
+}
+
+_STACKS = {
+    "total_moves": {
+        "triggers": [
+            {"at": 5, "action": {"intent": "minor_shift"}, "reset": False},
+            {"at": 15, "action": {"intent": "breakthrough"}, "reset": True},
+        ],
+    },
+    "pull_back_streak": {
+        "triggers": [{"at": 5, "action": {"intent": "full_breakdown"}, "reset": True}],
+    },
+    "push_streak": {
+        "triggers": [{"at": 5, "action": {"intent": "scene_advance"}, "reset": True}],
+    },
+    "structure_count": {
+        "triggers": [{"at": 3, "action": {"intent": "structure_payoff"}, "reset": True}],
+    },
+}
+
+_INTENTS = {
+    "strip_energy": [
+        {"action": "scene_down", "weight": 3},
+        {"action": "filter_sweep", "args": {"freq": 300, "duration": 3000}, "weight": 2},
+        {"action": "hush_master", "args": {"drop": 0.4, "duration": 2500}, "weight": 1},
+    ],
+    "add_energy": [
+        {"action": "scene_up", "weight": 3},
+        {"action": "trigger_hook", "weight": 2},
+    ],
+    "shift_structure": [
+        {"action": "swap_variant", "weight": 3},
+        {"action": "breakdown", "args": {"duration": 6000}, "weight": 2},
+        {"action": "trigger_hook", "weight": 1},
+    ],
+    "frantic_strip": [
+        {"action": "scene_down", "weight": 2},
+        {"action": "breakdown", "args": {"duration": 8000}, "weight": 2},
+        {"action": "hush_master", "args": {"drop": 0.6, "duration": 4000}, "weight": 1},
+    ],
+    "explosive_build": [
+        {"action": "scene_up", "weight": 2},
+        {"action": "trigger_hook", "weight": 2},
+        {"action": "bass_drop", "weight": 1},
+    ],
+    "total_reset": [
+        {"action": "fire_scene", "args": {"scene": 0}, "weight": 2},
+        {"action": "bass_drop", "weight": 1},
+    ],
+    "peak_frenzy": [
+        {"action": "fire_scene", "args": {"scene": 4}, "weight": 2},
+    ],
+    "minor_shift": [
+        {"action": "trigger_accent", "weight": 2},
+        {"action": "swap_variant", "weight": 1},
+    ],
+    "breakthrough": [
+        {"action": "scene_up", "weight": 3},
+        {"action": "trigger_hook", "weight": 2},
+        {"action": "bass_drop", "weight": 1},
+    ],
+    "full_breakdown": [
+        {"action": "fire_scene", "args": {"scene": 0}, "weight": 2},
+        {"action": "breakdown", "args": {"duration": 10000}, "weight": 2},
+    ],
+    "scene_advance": [
+        {"action": "scene_up", "weight": 3},
+        {"action": "trigger_accent", "weight": 1},
+    ],
+    "structure_payoff": [
+        {"action": "swap_variant", "weight": 2},
+        {"action": "scene_up", "weight": 2},
+        {"action": "trigger_hook", "weight": 1},
+    ],
+}
+
+_SIGNALS = {
+    "start": {
+        "action": "start_playing",
+        "condition": {"state_equals": "stopped"},
+    },
+    "stop": {
+        "action": "stop_playing",
+        "condition": {"state_equals": "playing", "min_elapsed_ms": 300000},
+    },
+}
+
+
+# Interval by bar count: up to 1.5 bars → 1m, up to 3 → 2m, up to 6 → 4m, else 8m
+_INTERVAL_BAR_LIMITS = np.array([1.5, 3, 6])
+_INTERVALS = np.array(["1m", "2m", "4m", "8m"])
+
+
+def _infer_intervals(durations_ms: list[float], bpm: float) -> list[str]:
+    """Snap slice durations to the nearest musical intervals."""
+    bar_ms = 60000 / bpm * 4
+    bars = np.asarray(durations_ms, dtype=np.float64) / bar_ms
+    return _INTERVALS[np.searchsorted(_INTERVAL_BAR_LIMITS, bars)].tolist()
+
+
+def _trigger_pool(indices: list[int], weight: int = 1) -> list[dict]:
+    """trigger_sample actions for the given sample track indices."""
+    return [{"action": "trigger_sample", "args": {"track": i}, "weight": weight} for i in indices]
 
 
 def generate_config(
@@ -37,13 +176,23 @@ def generate_config(
 
     primitives: {category: [Slice, ...]} from select_primitives()
     """
-    sample_tracks = []
     category_indices: dict[str, list[int]] = {}
     track_idx = 0
 
     # Category display order
     category_order = ["foundation", "groove", "bass", "harmonic_bed", "hook", "texture", "accent"]
 
+    # One track per selected slice; filled in place by track_idx
+    sample_tracks: list[dict] = [None] * sum(len(primitives.get(c, [])) for c in category_order)
+
+    # Muted-in-scenes: muted in any scene where this category is NOT active
+    # Hook and accent are always unmuted (gesture-triggered, not scene-controlled)
+    muted_map = {
+        category: [idx for idx, scene in enumerate(DENSITY_SCENES) if category not in scene["active"]]
+        for category in category_order
+        if category not in ("hook", "accent")
+    }
+
     for category in category_order:
         slices = primitives.get(category, [])
         if not slices:
@@ -53,10 +202,12 @@ def generate_config(
         mode_def = CATEGORY_MODES[category]
         color = CATEGORY_COLORS.get(category, "#aaa")
         volume = CATEGORY_VOLUMES.get(category, -8)
+        mode = mode_def["mode"]
+        if mode == "loop":
+            intervals = _infer_intervals([sl.duration_ms for sl in slices], bpm)
 
         for i, sl in enumerate(slices):
-            display_name = f"{category.replace('_', ' ').title()} {i + 1}"
-            mode = mode_def["mode"]
+            display_name = f"{category.replace('_', ' ').title()} {sl.index}"
 
             track = {
                 "name": display_name,
@@ -72,40 +223,31 @@ def generate_config(
             }
 
             if mode == "loop":
-                default_interval = mode_def["interval"] or "2m"
-                track["interval"] = _infer_interval(sl.duration_ms, bpm, default_interval)
-
-            # Muted-in-scenes: muted in any scene where this category is NOT active
-            # Hook and accent are always unmuted (gesture-triggered, not scene-controlled)
-            if category not in ("hook", "accent"):
-                muted_scenes = []
-                for scene_idx, scene in enumerate(DENSITY_SCENES):
-                    if category not in scene["active"]:
-                        muted_scenes.append(scene_idx)
-                if muted_scenes:
-                    track["muted_in_scenes"] = muted_scenes
-
-            sample_tracks.append(track)
+                track["interval"] = intervals[i]
+
+            muted_scenes = muted_map.get(category)
+            if muted_scenes:
+                track["muted_in_scenes"] = muted_scenes
+
+            sample_tracks[track_idx] = track
             category_indices[category].append(track_idx)
             track_idx += 1
 
     # Build scenes (no synth track mutes — pure sample engine)
-    scenes = []
-    for scene in DENSITY_SCENES:
-        scenes.append({
+    scenes = [
+        {
             "name": scene["name"],
             "mutes": [],  # no synth tracks
             "desc": f"Active: {', '.join(scene['active'])}",
-        })
+        }
+        for scene in DENSITY_SCENES
+    ]
 
     # Build intent pools using category indices
     hook_indices = category_indices.get("hook", [])
     accent_indices = category_indices.get("accent", [])
     bass_indices = category_indices.get("bass", [])
 
-    def _trigger_pool(indices, weight=1):
-        return [{"action": "trigger_sample", "args": {"track": i}, "weight": weight} for i in indices]
-
     config = {
         "version": "0.2",
         "name": f"{song_name} (Blended)",
@@ -115,133 +257,17 @@ def generate_config(
 
         "tracks": [],
 
-        "gestures": {
-            "/gesture/1": {
-                "name": "pull back",
-                "streams": {"energy_down": 1, "all_movement": 1},
-                "stacks": {"total_moves": 1, "pull_back_streak": 1},
-                "intents": ["strip_energy"],
-                "signals": ["stop"],
-            },
-            "/gesture/2": {
-                "name": "push energy",
-                "streams": {"energy_up": 1, "all_movement": 1},
-                "stacks": {"total_moves": 1, "push_streak": 1},
-                "intents": ["add_energy"],
-                "signals": ["start"],
-            },
-            "/gesture/3": {
-                "name": "structure shift",
-                "streams": {"structure_rate": 1, "all_movement": 1},
-                "stacks": {"total_moves": 1, "structure_count": 1},
-                "intents": ["shift_structure"],
-                "signals": [],
-            },
-        },
-
-        "streams": {
-            "energy_down": {
-                "window_ms": 5000,
-                "thresholds": [{"above": 6, "action": {"intent": "frantic_strip"}}],
-            },
-            "energy_up": {
-                "window_ms": 5000,
-                "thresholds": [{"above": 6, "action": {"intent": "explosive_build"}}],
-            },
-            "structure_rate": {
-                "window_ms": 5000,
-                "thresholds": [{"above": 4, "action": {"intent": "total_reset"}}],
-            },
-            "all_movement": {
-                "window_ms": 5000,
-                "thresholds": [{"above": 10, "action": {"intent": "peak_frenzy"}}],
-            },
-        },
-
-        "stacks": {
-            "total_moves": {
-                "triggers": [
-                    {"at": 5, "action": {"intent": "minor_shift"}, "reset": False},
-                    {"at": 15, "action": {"intent": "breakthrough"}, "reset": True},
-                ],
-            },
-            "pull_back_streak": {
-                "triggers": [{"at": 5, "action": {"intent": "full_breakdown"}, "reset": True}],
-            },
-            "push_streak": {
-                "triggers": [{"at": 5, "action": {"intent": "scene_advance"}, "reset": True}],
-            },
-            "structure_count": {
-                "triggers": [{"at": 3, "action": {"intent": "structure_payoff"}, "reset": True}],
-            },
-        },
-
+        "gestures": _GESTURES,
+        "streams": _STREAMS,
+        "stacks": _STACKS,
         "intents": {
-            "strip_energy": [
-                {"action": "scene_down", "weight": 3},
-                {"action": "filter_sweep", "args": {"freq": 300, "duration": 3000}, "weight": 2},
-                {"action": "hush_master", "args": {"drop": 0.4, "duration": 2500}, "weight": 1},
-            ],
-            "add_energy": [
-                {"action": "scene_up", "weight": 3},
-                {"action": "trigger_hook", "weight": 2},
-            ] + _trigger_pool(accent_indices, 2),
-            "shift_structure": [
-                {"action": "swap_variant", "weight": 3},
-                {"action": "breakdown", "args": {"duration": 6000}, "weight": 2},
-                {"action": "trigger_hook", "weight": 1},
-            ],
-            "frantic_strip": [
-                {"action": "scene_down", "weight": 2},
-                {"action": "breakdown", "args": {"duration": 8000}, "weight": 2},
-                {"action": "hush_master", "args": {"drop": 0.6, "duration": 4000}, "weight": 1},
-            ],
-            "explosive_build": [
-                {"action": "scene_up", "weight": 2},
-                {"action": "trigger_hook", "weight": 2},
-                {"action": "bass_drop", "weight": 1},
-            ],
-            "total_reset": [
-                {"action": "fire_scene", "args": {"scene": 0}, "weight": 2},
-                {"action": "bass_drop", "weight": 1},
-            ],
-            "peak_frenzy": [
-                {"action": "fire_scene", "args": {"scene": 4}, "weight": 2},
-            ] + _trigger_pool(hook_indices, 1) + _trigger_pool(accent_indices, 1),
-            "minor_shift": [
-                {"action": "trigger_accent", "weight": 2},
-                {"action": "swap_variant", "weight": 1},
-            ],
-            "breakthrough": [
-                {"action": "scene_up", "weight": 3},
-                {"action": "trigger_hook", "weight": 2},
-                {"action": "bass_drop", "weight": 1},
-            ],
-            "full_breakdown": [
-                {"action": "fire_scene", "args": {"scene": 0}, "weight": 2},
-                {"action": "breakdown", "args": {"duration": 10000}, "weight": 2},
-            ],
-            "scene_advance": [
-                {"action": "scene_up", "weight": 3},
-                {"action": "trigger_accent", "weight": 1},
-            ],
-            "structure_payoff": [
-                {"action": "swap_variant", "weight": 2},
-                {"action": "scene_up", "weight": 2},
-                {"action": "trigger_hook", "weight": 1},
-            ],
-        },
-
-        "signals": {
-            "start": {
-                "action": "start_playing",
-                "condition": {"state_equals": "stopped"},
-            },
-            "stop": {
-                "action": "stop_playing",
-                "condition": {"state_equals": "playing", "min_elapsed_ms": 300000},
-            },
+            **_INTENTS,
+            "add_energy": _INTENTS["add_energy"] + _trigger_pool(accent_indices, 2),
+            "peak_frenzy": (
+                _INTENTS["peak_frenzy"] + _trigger_pool(hook_indices, 1) + _trigger_pool(accent_indices, 1)
+            ),
         },
+        "signals": _SIGNALS,
 
         "scenes": scenes,
         "sample_tracks": sample_tracks,
@@ -257,7 +283,17 @@ def generate_config(
     return config
 
 
-def write_config(config: dict, output_path: Path) -> None:
-    """Write .perf.json to disk."""
+def write_config(config: dict, output_path: Path, pretty: bool = False) -> None:
+    """Write .perf.json to disk.
+
+    Compact by default; pretty=True indents for human reading.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        Path(output_path).write_bytes(orjson.dumps(config, option=option))
+        return
     with open(output_path, "w") as f:
-        json.dump(config, f, indent=2)
+        if pretty:
+            json.dump(config, f, indent=2)
+        else:
+            json.dump(config, f, separators=(",", ":"))
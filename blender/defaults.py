@@ -2,6 +2,8 @@
 
 # Stem separation
 DEMUCS_MODEL = "htdemucs"
+DEMUCS_SEGMENT = 7  # seconds per chunk; bounds VRAM (htdemucs allows up to 7.8)
+DEMUCS_OVERLAP = 0.25
 STEM_NAMES = ["drums", "bass", "vocals", "other"]
 
 # Onset detection (used for accent slicing fallback)
@@ -9,6 +11,13 @@ MIN_SLICE_DURATION_MS = 500
 FADE_OUT_MS = 10
 MAX_SLICES_PER_STEM = 30
 
+# Beat/onset detection runs at librosa's default rate; slices keep the full rate
+DETECTION_SR = 22050
+
+# Spectral analysis (one STFT per stem, sliced per sample)
+ANALYSIS_N_FFT = 2048
+ANALYSIS_HOP_LENGTH = 512
+
 # Category limits: 12-18 total samples per song
 CATEGORY_LIMITS = {
     "foundation": 2,
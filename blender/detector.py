@@ -1,31 +1,98 @@
 """Beat and onset detection using Librosa."""
 
+from math import gcd
 from pathlib import Path
 
-import librosa
 import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
 
+from .defaults import DETECTION_SR
 
-def detect_bpm(audio_path: Path) -> float:
-    """Detect BPM of an audio file.
+
+def load_audio(audio_path: Path) -> tuple[np.ndarray, int]:
+    """Decode an audio file to float32 (frames, channels) at its native sample rate.
+
+    Reads through libsndfile; formats it can't decode fall back to librosa.
+    Mono files come back 1-D.
+    """
+    try:
+        return sf.read(str(audio_path), dtype="float32", always_2d=False)
+    except RuntimeError:
+        import librosa
+
+        y, sr = librosa.load(str(audio_path), sr=None, mono=False)
+        return (y.T if y.ndim == 2 else y), sr
+
+
+def _load_mono(audio: Path | tuple[np.ndarray, int]) -> tuple[np.ndarray, int]:
+    """Mono float32 samples at DETECTION_SR from a path or a decoded (samples, sr) pair.
+
+    Beat and onset analysis cost scales with sample rate, and librosa's
+    defaults are tuned for 22.05 kHz, so higher-rate input is resampled.
+    """
+    y, sr = audio if isinstance(audio, tuple) else load_audio(audio)
+    if y.ndim == 2:
+        y = y.mean(axis=1)
+    if sr != DETECTION_SR:
+        g = gcd(DETECTION_SR, sr)
+        y = resample_poly(y, DETECTION_SR // g, sr // g).astype(np.float32, copy=False)
+        sr = DETECTION_SR
+    return y, sr
+
+
+def analyze_rhythm(
+    audio: Path | tuple[np.ndarray, int], bpm: float | None = None,
+) -> tuple[float, list[float]]:
+    """Detect tempo and bar boundaries in one beat-tracking pass.
+
+    The onset envelope is computed once and shared by tempo estimation and
+    beat tracking. When bpm is given it is used as the tempo and only the
+    beat positions are tracked.
+
+    Returns (bpm, bar start times in seconds).
+    """
+    import librosa
+
+    y, sr = _load_mono(audio)
+    duration = len(y) / sr
+
+    # Same envelope beat_track builds from y, computed here so it isn't rebuilt
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr, aggregate=np.median)
+    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, bpm=bpm)
+    # tempo can be an array in some librosa versions; beat_track reports 0
+    # for an envelope with no onsets even when given a bpm, so keep the hint
+    tempo = float(bpm) if bpm else float(np.atleast_1d(tempo)[0])
+    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
+
+    if len(beat_times) < 4 and tempo > 0:
+        # Not enough beats detected — fall back to BPM-based grid
+        bar_duration = 4 * 60.0 / tempo
+        return tempo, [i * bar_duration for i in range(int(duration / bar_duration) + 1)]
+
+    # Group beats into bars (every 4 beats); with no tempo at all the
+    # whole signal is a single bar
+    return tempo, beat_times[::4].tolist() or [0.0]
+
+
+def detect_bpm(audio: Path | tuple[np.ndarray, int]) -> float:
+    """Detect BPM of an audio file or decoded (samples, sr) pair.
 
     Returns estimated BPM as a float (e.g., 120.0).
     """
-    y, sr = librosa.load(str(audio_path), sr=None)
-    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-    # tempo can be an array in some librosa versions
-    if isinstance(tempo, np.ndarray):
-        tempo = float(tempo[0])
-    return round(float(tempo), 1)
+    tempo, _ = analyze_rhythm(audio)
+    return round(tempo, 1)
 
 
-def detect_onsets(audio_path: Path, is_drums: bool = False) -> list[float]:
-    """Detect onset times in an audio file.
+def detect_onsets(audio: Path | tuple[np.ndarray, int], is_drums: bool = False) -> list[float]:
+    """Detect onset times in an audio file or decoded (samples, sr) pair.
 
     Uses more sensitive settings for drums, less sensitive for melodic stems
     to avoid over-slicing piano/vocal/bass content.
     """
-    y, sr = librosa.load(str(audio_path), sr=None)
+    import librosa
+
+    y, sr = _load_mono(audio)
 
     if is_drums:
         # Drums: default sensitivity works well
@@ -45,7 +112,7 @@ def detect_onsets(audio_path: Path, is_drums: bool = False) -> list[float]:
     return onset_times.tolist()
 
 
-def detect_bar_boundaries(audio_path: Path, bpm: float) -> list[float]:
+def detect_bar_boundaries(audio: Path | tuple[np.ndarray, int], bpm: float) -> list[float]:
     """Detect bar boundaries (every 4 beats) aligned to the beat grid.
 
     Uses librosa beat tracking to find actual beat positions, then groups them
@@ -53,24 +120,12 @@ def detect_bar_boundaries(audio_path: Path, bpm: float) -> list[float]:
 
     Returns list of times in seconds at the start of each bar.
     """
-    y, sr = librosa.load(str(audio_path), sr=None)
-    duration = len(y) / sr
-
-    # Get beat positions from librosa
-    _, beat_frames = librosa.beat.beat_track(y=y, sr=sr, bpm=bpm)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-
-    if len(beat_times) < 4:
-        # Not enough beats detected — fall back to BPM-based grid
-        bar_duration = 4 * 60.0 / bpm
-        return [i * bar_duration for i in range(int(duration / bar_duration) + 1)]
-
-    # Group beats into bars (every 4 beats)
-    bar_boundaries = [beat_times[i] for i in range(0, len(beat_times), 4)]
-
+    _, bar_boundaries = analyze_rhythm(audio, bpm)
     return bar_boundaries
 
 
 def get_duration(audio_path: Path) -> float:
     """Get duration of an audio file in seconds."""
+    import librosa
+
     return float(librosa.get_duration(path=str(audio_path)))
@@ -2,24 +2,40 @@
 
 import shutil
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 from .separator import separate
-from .detector import detect_bpm, detect_bar_boundaries
-from .slicer import slice_at_bars
+from .detector import analyze_rhythm, detect_bar_boundaries
+from .slicer import Slice, slice_at_bars
 from .categorizer import select_primitives
 from .config_generator import generate_config, write_config
 from .defaults import STEM_NAMES
 
 
+def _slice_stem(
+    stem_path: Path, bar_boundaries: list[float], samples_dir: Path, stem_name: str,
+) -> tuple[str, list[Slice]]:
+    """Slice one stem at the song's bar boundaries. Runs in a worker process.
+
+    Returns (stem_name, slices).
+    """
+    return stem_name, slice_at_bars(stem_path, bar_boundaries, samples_dir, stem_name)
+
+
 def blend(
     song_path: str | Path,
     output_dir: str | Path | None = None,
     bpm_override: float | None = None,
     stems_filter: list[str] | None = None,
     verbose: bool = False,
+    pretty: bool = False,
 ) -> Path:
-    """Run the full Blender pipeline: separate → detect bars → slice → select → config.
+    """Run the full Blender pipeline: detect bars → separate → slice → select → config.
+
+    Bar boundaries are tracked once on the full mix and shared by every
+    stem: stems come from the same recording, so they share its bar grid,
+    and slicing them on one grid keeps loops from different stems aligned.
 
     Returns path to the generated .perf.json.
     """
@@ -38,14 +54,17 @@ def blend(
 
     log = print if verbose else lambda *a, **k: None
 
-    # === Stage 1: Detect BPM ===
+    # === Stage 1: Detect BPM and bar boundaries on the mix ===
     if bpm_override:
         bpm = bpm_override
         print(f"  BPM: {bpm} (override)")
+        bar_boundaries = detect_bar_boundaries(song_path, bpm)
     else:
         print("  Detecting BPM...")
-        bpm = detect_bpm(song_path)
+        bpm, bar_boundaries = analyze_rhythm(song_path)
+        bpm = round(bpm, 1)
         print(f"  BPM: {bpm}")
+    log(f"  {len(bar_boundaries)} bar boundaries detected")
 
     # === Stage 2: Separate stems ===
     print("\nSeparating stems...")
@@ -57,21 +76,24 @@ def blend(
             stem_names = [s for s in stem_names if s in stems_filter]
         print(f"  {' / '.join(stem_names)}")
 
-        # === Stage 3: Detect bar boundaries and slice each stem ===
+        # === Stage 3: Slice each stem at the mix's bar boundaries ===
+        # Stems are independent, so each one is sliced in its own process
         print("\nSlicing at bar boundaries...")
-        stem_slices: dict[str, list] = {}
-
+        results: dict[str, list[Slice]] = {}
+
+        with ProcessPoolExecutor(max_workers=max(1, min(4, len(stem_names)))) as pool:
+            futures = [
+                pool.submit(_slice_stem, stems[stem_name], bar_boundaries, samples_dir, stem_name)
+                for stem_name in stem_names
+            ]
+            for future in as_completed(futures):
+                stem_name, slices = future.result()
+                results[stem_name] = slices
+
+        stem_slices: dict[str, list[Slice]] = {}
         for stem_name in stem_names:
-            stem_path = stems[stem_name]
-            log(f"  Analyzing {stem_name}...")
-
-            bar_boundaries = detect_bar_boundaries(stem_path, bpm)
-            log(f"    {len(bar_boundaries)} bar boundaries detected")
-
-            slices = slice_at_bars(stem_path, bar_boundaries, samples_dir, stem_name)
-            log(f"    {len(slices)} bar slices")
-            stem_slices[stem_name] = slices
-            print(f"  {stem_name}: {len(slices)} bars")
+            stem_slices[stem_name] = results[stem_name]
+            print(f"  {stem_name}: {len(results[stem_name])} bars")
 
     finally:
         shutil.rmtree(work_dir, ignore_errors=True)
@@ -89,7 +111,7 @@ def blend(
     # === Stage 5: Generate config ===
     config = generate_config(primitives, bpm, song_name, samples_dir)
     config_path = output_dir / f"{song_name}.perf.json"
-    write_config(config, config_path)
+    write_config(config, config_path, pretty=pretty)
 
     print(f"\nDone! {total_samples} samples + {config_path.name}")
     print(f"\nNext: npm start → open http://localhost:8080 → load {config_path.name}")
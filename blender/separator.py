@@ -1,33 +1,95 @@
 """Stem separation using Demucs."""
 
+import importlib.util
 import subprocess
 import sys
 from pathlib import Path
 
-from .defaults import DEMUCS_MODEL, STEM_NAMES
+import soundfile as sf
 
+from .defaults import DEMUCS_MODEL, DEMUCS_SEGMENT, DEMUCS_OVERLAP, STEM_NAMES
 
-def separate(song_path: Path, output_dir: Path, model: str = DEMUCS_MODEL) -> dict[str, Path]:
-    """Separate a song into stems using Demucs.
+_models: dict[str, object] = {}  # loaded Demucs models, kept resident across songs
 
-    Returns dict mapping stem name to WAV path, e.g.:
-        {"drums": Path("output/drums.wav"), "bass": Path("output/bass.wav"), ...}
+
+def _get_model(name: str):
+    """Load a pretrained Demucs model once per process."""
+    if name not in _models:
+        from demucs.pretrained import get_model
+
+        _models[name] = get_model(name)
+    return _models[name]
+
+
+def _pick_device() -> str | None:
+    """Fastest available torch device: CUDA, then Apple MPS, then CPU.
+
+    None when torch isn't importable here.
     """
-    song_path = Path(song_path)
-    output_dir = Path(output_dir)
+    try:
+        import torch
+    except ImportError:
+        return None
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
 
-    if not song_path.exists():
-        raise FileNotFoundError(f"Song not found: {song_path}")
 
-    # Demucs outputs to: output_dir/model_name/track_name/stem.wav
-    # We use the default filename pattern and look in the right place.
+def _separate_in_process(song_path: Path, stems_dir: Path, model_name: str) -> bool:
+    """Run Demucs through its Python API, writing stem WAVs into stems_dir.
+
+    Returns False when the in-process path can't be used (demucs isn't
+    importable, or libsndfile can't decode the song) so the caller can fall
+    back to the demucs CLI.
+    """
+    if importlib.util.find_spec("demucs") is None:
+        return False
+    try:
+        audio, sr = sf.read(str(song_path), dtype="float32", always_2d=True)
+    except RuntimeError:
+        return False  # the demucs CLI decodes through ffmpeg instead
+
+    import torch
+    from demucs.apply import apply_model
+    from demucs.audio import convert_audio
+
+    try:
+        model = _get_model(model_name)
+        wav = convert_audio(torch.from_numpy(audio.T.copy()), sr, model.samplerate, model.audio_channels)
+        # Normalize the mix the same way the demucs CLI does
+        ref = wav.mean(0)
+        mean, std = ref.mean(), ref.std() + 1e-8
+        with torch.no_grad():
+            sources = apply_model(
+                model, ((wav - mean) / std)[None],
+                device=_pick_device(), segment=DEMUCS_SEGMENT, overlap=DEMUCS_OVERLAP,
+            )[0]
+        sources = sources * std + mean
+    except Exception as e:
+        raise RuntimeError(f"Demucs failed:\n{e}") from e
+
+    stems_dir.mkdir(parents=True, exist_ok=True)
+    for stem_name, source in zip(model.sources, sources):
+        sf.write(str(stems_dir / f"{stem_name}.wav"), source.cpu().numpy().T, model.samplerate, subtype="FLOAT")
+    return True
+
+
+def _separate_subprocess(song_path: Path, output_dir: Path, model: str) -> None:
+    """Run the demucs CLI in a child process."""
     cmd = [
         sys.executable, "-m", "demucs",
         "--name", model,
         "--out", str(output_dir),
         "--float32",
-        str(song_path),
+        "--segment", str(DEMUCS_SEGMENT),
+        "--overlap", str(DEMUCS_OVERLAP),
     ]
+    device = _pick_device()
+    if device:
+        cmd += ["--device", device]
+    cmd.append(str(song_path))
 
     try:
         subprocess.run(cmd, check=True, capture_output=True, text=True)
@@ -40,10 +102,30 @@ def separate(song_path: Path, output_dir: Path, model: str = DEMUCS_MODEL) -> di
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Demucs failed:\n{e.stderr}")
 
-    # Demucs puts stems in output_dir/model_name/track_name/stem.wav
+
+def separate(song_path: Path, output_dir: Path, model: str = DEMUCS_MODEL) -> dict[str, Path]:
+    """Separate a song into stems using Demucs.
+
+    Runs in-process when demucs is importable (the model stays loaded for
+    later songs), otherwise through the demucs CLI.
+
+    Returns dict mapping stem name to WAV path, e.g.:
+        {"drums": Path("output/drums.wav"), "bass": Path("output/bass.wav"), ...}
+    """
+    song_path = Path(song_path)
+    output_dir = Path(output_dir)
+
+    if not song_path.exists():
+        raise FileNotFoundError(f"Song not found: {song_path}")
+
+    # Demucs puts stems in output_dir/model_name/track_name/stem.wav;
+    # the in-process path writes the same layout.
     song_name = song_path.stem
     stems_dir = output_dir / model / song_name
 
+    if not _separate_in_process(song_path, stems_dir, model):
+        _separate_subprocess(song_path, output_dir, model)
+
     stems = {}
     for stem_name in STEM_NAMES:
         stem_path = stems_dir / f"{stem_name}.wav"
@@ -1,12 +1,27 @@
 """Slice audio stems at bar boundaries or onset points."""
 
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 
+import numba
 import numpy as np
 import soundfile as sf
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import get_window
 
-from .defaults import MIN_SLICE_DURATION_MS, FADE_OUT_MS, MAX_SLICES_PER_STEM
+from .defaults import (
+    MIN_SLICE_DURATION_MS, FADE_OUT_MS, MAX_SLICES_PER_STEM,
+    ANALYSIS_N_FFT, ANALYSIS_HOP_LENGTH,
+)
+
+_FRAME_BLOCK = 1024  # STFT frames per rfft batch
+_WRITE_WORKERS = 4  # threads writing slice WAVs
+_READ_BLOCK = 1 << 16  # frames per block when streaming a stem WAV
 
 
 @dataclass
@@ -15,12 +30,254 @@ class Slice:
     duration_ms: float
     start_time: float  # seconds into original stem
     category: str = ""  # filled by categorizer
+    index: int = 0  # 1-based position within category, filled by categorizer
     energy: float = 0.0  # RMS energy, used for selection
     spectral_centroid: float = 0.0  # Hz, used for selection
 
 
+@dataclass
+class SliceTable:
+    """Struct-of-arrays view over a list of slices, for vectorized selection.
+
+    Columns are aligned with slices; table[i] is the Slice itself, so
+    callers can still set category/index/path on it.
+    """
+    slices: list[Slice]
+    durations_ms: np.ndarray
+    start_times: np.ndarray
+    energies: np.ndarray
+    centroids: np.ndarray
+
+    @classmethod
+    def from_slices(cls, slices: list[Slice]) -> "SliceTable":
+        """Gather the numeric Slice fields into float64 columns in one pass each."""
+        def column(attr: str) -> np.ndarray:
+            return np.fromiter((getattr(s, attr) for s in slices), dtype=np.float64, count=len(slices))
+
+        return cls(
+            slices=list(slices),
+            durations_ms=column("duration_ms"),
+            start_times=column("start_time"),
+            energies=column("energy"),
+            centroids=column("spectral_centroid"),
+        )
+
+    @property
+    def paths(self) -> list[Path]:
+        return [s.path for s in self.slices]
+
+    def __len__(self) -> int:
+        return len(self.slices)
+
+    def __getitem__(self, i: int) -> Slice:
+        return self.slices[i]
+
+
+@lru_cache(maxsize=None)
+def _fft_tables(sr: int) -> tuple[np.ndarray, np.ndarray]:
+    """Hann window and rfft bin frequencies for centroid analysis, per sample rate."""
+    window = get_window("hann", ANALYSIS_N_FFT).astype(np.float32)
+    freqs = rfftfreq(ANALYSIS_N_FFT, 1 / sr).astype(np.float32)
+    return window, freqs
+
+
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def _centroid_from_mag(mag: np.ndarray, freqs: np.ndarray, out: np.ndarray) -> None:
+    """Write the magnitude-weighted mean frequency of each row of mag into out."""
+    for t in numba.prange(mag.shape[0]):
+        num = 0.0
+        den = 0.0
+        for k in range(mag.shape[1]):
+            num += freqs[k] * mag[t, k]
+            den += mag[t, k]
+        out[t] = num / den if den > 1e-10 else 0.0
+
+
+def _centroid_padded(padded: np.ndarray, sr: int, out: np.ndarray) -> int:
+    """Centroids of every full STFT frame of an edge-padded mono signal, written into out.
+
+    Returns the frame count; the first count * hop samples of padded are
+    consumed. The rfft runs in blocks of frames to bound peak memory on long
+    stems; the windowed-frame and magnitude buffers are allocated once and
+    reused by every block.
+    """
+    if len(padded) < ANALYSIS_N_FFT:
+        return 0
+    window, freqs = _fft_tables(sr)
+    frames = sliding_window_view(padded, ANALYSIS_N_FFT)[::ANALYSIS_HOP_LENGTH]
+
+    block_len = min(len(frames), _FRAME_BLOCK)
+    windowed = np.empty((block_len, ANALYSIS_N_FFT), dtype=np.float32)
+    mag = np.empty((block_len, len(freqs)), dtype=np.float32)
+    for b in range(0, len(frames), _FRAME_BLOCK):
+        n = min(_FRAME_BLOCK, len(frames) - b)
+        np.multiply(frames[b:b + n], window, out=windowed[:n])
+        np.abs(rfft(windowed[:n], axis=1, overwrite_x=True), out=mag[:n])
+        _centroid_from_mag(mag[:n], freqs, out[b:b + n])
+    return len(frames)
+
+
+def _n_frames(n_samples: int) -> int:
+    """Number of centered STFT frames over n_samples, as librosa.stft counts them."""
+    return 1 + n_samples // ANALYSIS_HOP_LENGTH
+
+
+def _centroid_frames(mono: np.ndarray, sr: int) -> np.ndarray:
+    """Per-frame spectral centroid (Hz) of a whole float32 mono stem.
+
+    Frames are centered like librosa.stft, so frame t covers sample t * hop.
+    """
+    centroids = np.empty(_n_frames(len(mono)), dtype=np.float32)
+    _centroid_padded(np.pad(mono, ANALYSIS_N_FFT // 2), sr, centroids)
+    return centroids
+
+
+def _mean_centroid(centroid_frames: np.ndarray, start_sample: int, end_sample: int) -> float:
+    """Mean centroid over the STFT frames covering [start_sample, end_sample)."""
+    f0 = start_sample // ANALYSIS_HOP_LENGTH
+    f1 = max(f0 + 1, end_sample // ANALYSIS_HOP_LENGTH)
+    return float(np.mean(centroid_frames[f0:f1]))
+
+
+@numba.njit(cache=True, fastmath=True)
+def _downmix_with_power(frames: np.ndarray, mono: np.ndarray, power_csum: np.ndarray) -> None:
+    """One pass over (samples, channels): channel mean into mono, running sum of its square.
+
+    The running sum continues from power_csum[0], so blocks can be chained.
+    """
+    n_channels = frames.shape[1]
+    acc = power_csum[0]
+    for i in range(frames.shape[0]):
+        v = 0.0
+        for c in range(n_channels):
+            v += frames[i, c]
+        v /= n_channels
+        mono[i] = v
+        acc += v * v
+        power_csum[i + 1] = acc
+
+
+def _stem_mono_and_power(audio: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Mono float32 downmix of a stem and its power prefix sum.
+
+    The prefix sum has a leading 0, so csum[b] - csum[a] is the energy of [a, b).
+    """
+    frames = audio.reshape(len(audio), -1)
+    mono = np.empty(len(frames), dtype=np.float32)
+    power_csum = np.empty(len(frames) + 1, dtype=np.float64)
+    power_csum[0] = 0.0
+    _downmix_with_power(frames, mono, power_csum)
+    return mono, power_csum
+
+
+def _stream_analysis(f: sf.SoundFile) -> tuple[np.ndarray, np.ndarray]:
+    """Power prefix sum and per-frame centroid of an open stem file, read block by block.
+
+    Same results as _stem_mono_and_power + _centroid_frames, but only a block
+    of the mono downmix (plus one frame of overlap) is held at a time.
+    """
+    half = ANALYSIS_N_FFT // 2
+    power_csum = np.empty(f.frames + 1, dtype=np.float64)
+    power_csum[0] = 0.0
+    centroids = np.empty(_n_frames(f.frames), dtype=np.float32)
+    mono = np.empty(_READ_BLOCK, dtype=np.float32)
+    pending = np.zeros(half, dtype=np.float32)  # left edge padding, then unconsumed samples
+    pos = n_frames = 0
+    for block in f.blocks(blocksize=_READ_BLOCK, dtype="float32", always_2d=True):
+        n = len(block)
+        _downmix_with_power(block, mono[:n], power_csum[pos:pos + n + 1])
+        pos += n
+        pending = np.concatenate([pending, mono[:n]])
+        done = _centroid_padded(pending, f.samplerate, centroids[n_frames:])
+        n_frames += done
+        pending = pending[done * ANALYSIS_HOP_LENGTH:]
+
+    # Right edge padding completes the trailing frames
+    tail = np.concatenate([pending, np.zeros(half, dtype=np.float32)])
+    n_frames += _centroid_padded(tail, f.samplerate, centroids[n_frames:])
+    return power_csum[:pos + 1], centroids[:n_frames]
+
+
+def _slice_rms(power_csum: np.ndarray, start_sample: int, end_sample: int) -> float:
+    """RMS of [start_sample, end_sample) from the power prefix sum."""
+    n = max(1, end_sample - start_sample)
+    return float(np.sqrt(max(0.0, power_csum[end_sample] - power_csum[start_sample]) / n))
+
+
+def _slice_bounds(times: list[float], total_samples: int, sr: int) -> tuple[np.ndarray, np.ndarray]:
+    """Sample ranges [start, end) from each time to the next (the last runs to end of file)."""
+    starts = np.clip((np.asarray(times, dtype=np.float64) * sr).astype(np.int64), 0, total_samples)
+    ends = np.append(starts[1:], total_samples)
+    return starts, np.maximum(ends, starts)
+
+
+def _longest(lengths: np.ndarray, n: int) -> np.ndarray:
+    """Mask of the n largest lengths; ties go to the earlier entry, as with a stable sort."""
+    if len(lengths) <= n:
+        return np.ones(len(lengths), dtype=bool)
+    if n <= 0:
+        return np.zeros(len(lengths), dtype=bool)
+    cutoff = np.partition(lengths, len(lengths) - n)[len(lengths) - n]
+    mask = lengths > cutoff
+    tied = np.flatnonzero(lengths == cutoff)
+    mask[tied[:n - np.count_nonzero(mask)]] = True
+    return mask
+
+
+def _write_slice(path: Path, chunk: np.ndarray, sr: int) -> None:
+    """Write one slice as 16-bit PCM WAV.
+
+    Format and subtype are spelled out so libsndfile doesn't infer them
+    from the file extension on every write.
+    """
+    sf.write(str(path), chunk, sr, format="WAV", subtype="PCM_16")
+
+
+def _fade_ramp(fade_samples: int, multichannel: bool) -> np.ndarray:
+    """Linear 1 → 0 float32 fade-out ramp, shaped to broadcast over (samples, channels) chunks."""
+    fade = np.linspace(1.0, 0.0, fade_samples, dtype=np.float32)
+    return fade[:, np.newaxis] if multichannel else fade
+
+
+@dataclass
+class _StemSource:
+    """A stem's stem-wide analysis plus random access to its samples."""
+    sr: int
+    multichannel: bool  # chunks come back (samples, channels) rather than 1-D
+    power_csum: np.ndarray  # mono power prefix sum, len = samples + 1
+    centroid_frames: np.ndarray  # per-frame spectral centroid (Hz)
+    read: Callable[[int, int], np.ndarray]  # float32 samples [start, end), safe to modify
+
+
+@contextmanager
+def _open_stem(stem: Path | tuple[np.ndarray, int]) -> Iterator[_StemSource]:
+    """Open a stem given as a WAV path or an already-decoded (samples, sr) pair.
+
+    WAV paths go through a seekable sf.SoundFile: power and centroid are
+    built block by block and each slice is read on demand, so neither the
+    multichannel stem nor its mono downmix is ever held in memory whole.
+    """
+    if isinstance(stem, tuple):
+        audio, sr = stem
+        audio = audio.astype(np.float32, copy=False)
+        mono, power_csum = _stem_mono_and_power(audio)
+        centroid_frames = _centroid_frames(mono, sr)
+        del mono
+        yield _StemSource(sr, audio.ndim == 2, power_csum, centroid_frames, lambda start, end: audio[start:end].copy())
+        return
+
+    with sf.SoundFile(str(stem)) as f:
+        power_csum, centroid_frames = _stream_analysis(f)
+
+        def read(start: int, end: int) -> np.ndarray:
+            f.seek(start)
+            return f.read(end - start, dtype="float32")
+
+        yield _StemSource(f.samplerate, f.channels > 1, power_csum, centroid_frames, read)
+
+
 def slice_at_bars(
-    stem_path: Path,
+    stem: Path | tuple[np.ndarray, int],
     bar_boundaries: list[float],
     output_dir: Path,
     stem_name: str,
@@ -28,65 +285,62 @@ def slice_at_bars(
 ) -> list[Slice]:
     """Slice a stem at bar boundaries, producing musically-aligned loops.
 
+    stem is a WAV path or an already-decoded (samples, sr) pair.
     Each slice spans one or more bars. Returns Slice objects with
     pre-computed energy and spectral centroid for downstream selection.
     """
-    import librosa
-
-    audio, sr = sf.read(str(stem_path))
-    is_stereo = audio.ndim == 2
-    total_samples = len(audio)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-
-    fade_samples = int(sr * fade_out_ms / 1000)
     slices = []
 
-    # Add end-of-file as final boundary
-    boundaries = list(bar_boundaries) + [total_samples / sr]
-
-    for i in range(len(boundaries) - 1):
-        start_sec = boundaries[i]
-        end_sec = boundaries[i + 1]
-        start_sample = max(0, int(start_sec * sr))
-        end_sample = min(total_samples, int(end_sec * sr))
-
-        chunk = audio[start_sample:end_sample].copy()
-        if len(chunk) < sr * 0.25:  # skip chunks shorter than 250ms
-            continue
-
-        # Apply fade-out
-        if fade_samples > 0 and len(chunk) > fade_samples:
-            fade = np.linspace(1.0, 0.0, fade_samples)
-            if is_stereo:
-                chunk[-fade_samples:] *= fade[:, np.newaxis]
-            else:
+    with _open_stem(stem) as src, ThreadPoolExecutor(max_workers=_WRITE_WORKERS) as writer:
+        sr, centroid_frames = src.sr, src.centroid_frames
+        total_samples = len(src.power_csum) - 1
+
+        fade_samples = int(sr * fade_out_ms / 1000)
+        fade = _fade_ramp(fade_samples, src.multichannel)
+
+        # Each bar runs to the next boundary; the last one to end-of-file
+        starts, ends = _slice_bounds(bar_boundaries, total_samples, sr)
+        keep = (ends - starts) >= sr * 0.25  # skip chunks shorter than 250ms
+
+        # WAV writes go to a small thread pool (libsndfile releases the GIL)
+        writes = []
+        for i in np.flatnonzero(keep):
+            start_sec = float(bar_boundaries[i])
+            start_sample, end_sample = int(starts[i]), int(ends[i])
+
+            chunk = src.read(start_sample, end_sample)
+
+            # Apply fade-out
+            if fade_samples > 0 and len(chunk) > fade_samples:
                 chunk[-fade_samples:] *= fade
 
-        # Compute analysis features (mono for analysis)
-        mono = chunk.mean(axis=1) if is_stereo else chunk
-        rms = float(np.sqrt(np.mean(mono ** 2)))
-        # Spectral centroid via librosa
-        centroid = float(np.mean(librosa.feature.spectral_centroid(y=mono.astype(np.float32), sr=sr)))
-
-        filename = f"{stem_name}-bar-{i + 1:02d}.wav"
-        out_path = output_dir / filename
-        sf.write(str(out_path), chunk, sr)
-
-        duration_ms = len(chunk) / sr * 1000
-        slices.append(Slice(
-            path=out_path,
-            duration_ms=duration_ms,
-            start_time=start_sec,
-            energy=rms,
-            spectral_centroid=centroid,
-        ))
+            # Compute analysis features from the stem-wide mono power and STFT
+            rms = _slice_rms(src.power_csum, start_sample, end_sample)
+            centroid = _mean_centroid(centroid_frames, start_sample, end_sample)
+
+            filename = f"{stem_name}-bar-{i + 1:02d}.wav"
+            out_path = output_dir / filename
+            writes.append(writer.submit(_write_slice, out_path, chunk, sr))
+
+            duration_ms = len(chunk) / sr * 1000
+            slices.append(Slice(
+                path=out_path,
+                duration_ms=duration_ms,
+                start_time=start_sec,
+                energy=rms,
+                spectral_centroid=centroid,
+            ))
+
+        for write in writes:
+            write.result()  # surface any write error
 
     return slices
 
 
 def slice_stem(
-    stem_path: Path,
+    stem: Path | tuple[np.ndarray, int],
     onset_times: list[float],
     output_dir: Path,
     stem_name: str,
@@ -94,66 +348,59 @@ def slice_stem(
     fade_out_ms: int = FADE_OUT_MS,
     max_slices: int = MAX_SLICES_PER_STEM,
 ) -> list[Slice]:
-    """Slice a stem WAV at onset points and save individual samples.
+    """Slice a stem at onset points and save individual samples.
 
+    stem is a WAV path or an already-decoded (samples, sr) pair.
     Returns list of Slice objects with path, duration, and start time.
     """
-    import librosa
-
-    audio, sr = sf.read(str(stem_path))
-    is_stereo = audio.ndim == 2
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    slices = []
 
-    fade_samples = int(sr * fade_out_ms / 1000)
-    min_samples = int(sr * min_duration_ms / 1000)
+    with _open_stem(stem) as src, ThreadPoolExecutor(max_workers=_WRITE_WORKERS) as writer:
+        sr, centroid_frames = src.sr, src.centroid_frames
+        total_samples = len(src.power_csum) - 1
 
-    slices = []
-    total_samples = len(audio)
-    boundaries = list(onset_times) + [total_samples / sr]
+        fade_samples = int(sr * fade_out_ms / 1000)
+        fade = _fade_ramp(fade_samples, src.multichannel)
+        min_samples = int(sr * min_duration_ms / 1000)
 
-    for i, start_sec in enumerate(onset_times):
-        start_sample = max(0, int(start_sec * sr))
-        end_sec = boundaries[i + 1]
-        end_sample = min(total_samples, int(end_sec * sr))
+        # Each slice runs to the next onset; the last one to end-of-file
+        starts, ends = _slice_bounds(onset_times, total_samples, sr)
+        keep = (ends - starts) >= min_samples
+        # Cap at max_slices, keeping the longest, before anything is written
+        keep[keep] = _longest(ends[keep] - starts[keep], max_slices)
 
-        chunk = audio[start_sample:end_sample].copy()
+        # WAV writes go to a small thread pool (libsndfile releases the GIL)
+        writes = []
+        for i in np.flatnonzero(keep):
+            start_sec = float(onset_times[i])
+            start_sample, end_sample = int(starts[i]), int(ends[i])
 
-        if len(chunk) < min_samples:
-            continue
+            chunk = src.read(start_sample, end_sample)
 
-        # Apply fade-out
-        if fade_samples > 0 and len(chunk) > fade_samples:
-            fade = np.linspace(1.0, 0.0, fade_samples)
-            if is_stereo:
-                chunk[-fade_samples:] *= fade[:, np.newaxis]
-            else:
+            # Apply fade-out
+            if fade_samples > 0 and len(chunk) > fade_samples:
                 chunk[-fade_samples:] *= fade
 
-        # Compute analysis features
-        mono = chunk.mean(axis=1) if is_stereo else chunk
-        rms = float(np.sqrt(np.mean(mono ** 2)))
-        centroid = float(np.mean(librosa.feature.spectral_centroid(y=mono.astype(np.float32), sr=sr)))
-
-        filename = f"{stem_name}-{i + 1:02d}.wav"
-        out_path = output_dir / filename
-        sf.write(str(out_path), chunk, sr)
-
-        duration_ms = len(chunk) / sr * 1000
-        slices.append(Slice(
-            path=out_path,
-            duration_ms=duration_ms,
-            start_time=start_sec,
-            energy=rms,
-            spectral_centroid=centroid,
-        ))
-
-    # Cap at max_slices, keeping the longest
-    if len(slices) > max_slices:
-        slices.sort(key=lambda s: s.duration_ms, reverse=True)
-        for discarded in slices[max_slices:]:
-            discarded.path.unlink(missing_ok=True)
-        slices = slices[:max_slices]
-        slices.sort(key=lambda s: s.start_time)
+            # Compute analysis features
+            rms = _slice_rms(src.power_csum, start_sample, end_sample)
+            centroid = _mean_centroid(centroid_frames, start_sample, end_sample)
+
+            filename = f"{stem_name}-{i + 1:02d}.wav"
+            out_path = output_dir / filename
+            writes.append(writer.submit(_write_slice, out_path, chunk, sr))
+
+            duration_ms = len(chunk) / sr * 1000
+            slices.append(Slice(
+                path=out_path,
+                duration_ms=duration_ms,
+                start_time=start_sec,
+                energy=rms,
+                spectral_centroid=centroid,
+            ))
+
+        for write in writes:
+            write.result()  # surface any write error
 
     return slices